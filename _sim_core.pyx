@@ -0,0 +1,109 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, initializedcheck=False, cdivision=True
+"""(s, S) 库存仿真主循环的 Cython 实现，接口与 simulation._run_core 一致"""
+import numpy as np
+from libc.math cimport INFINITY
+from libc.stdint cimport int8_t, int16_t, int64_t
+
+
+cpdef tuple run_core(int64_t s, int64_t S, double T, double L, double r, double K, double c_unit,
+                     const double[::1] arrivals, const int64_t[::1] demand, bint skip_idle):
+    """离散事件主循环，返回事件日志数组及终止状态；持有成本由调用方对库存轨迹积分得到"""
+    # 每位顾客至多触发一次订货，事件总数不超过 2 * 顾客数 + 1
+    cdef Py_ssize_t cap = 2 * arrivals.shape[0] + 1
+    times_arr = np.empty(cap, np.float64)
+    inventory_arr = np.empty(cap, np.int16)
+    on_order_arr = np.empty(cap, np.int16)
+    codes_arr = np.empty(cap, np.int8)
+    dR_arr = np.empty(cap, np.float64)
+    dC_arr = np.empty(cap, np.float64)
+    delta_arr = np.empty(cap, np.int16)
+    cdef double[::1] times = times_arr
+    cdef int16_t[::1] inventory = inventory_arr
+    cdef int16_t[::1] on_order = on_order_arr
+    cdef int8_t[::1] codes = codes_arr
+    cdef double[::1] dR = dR_arr
+    cdef double[::1] dC = dC_arr
+    cdef int16_t[::1] delta = delta_arr
+
+    cdef double t = 0.0
+    cdef int64_t x = S
+    cdef int64_t y = 0
+    cdef double C = 0.0
+    cdef double R = 0.0
+    cdef Py_ssize_t k = 0
+    cdef double t_C = arrivals[0]
+    cdef double t_O = INFINITY
+    cdef Py_ssize_t last = arrivals.shape[0] - 1
+    cdef Py_ssize_t n = 1
+    cdef Py_ssize_t lo, hi, mid
+    cdef int64_t D, w, d
+    cdef double dr, dc
+    cdef int8_t code
+
+    times[0] = 0.0
+    inventory[0] = <int16_t>x
+    on_order[0] = 0
+    codes[0] = 0
+    dR[0] = 0.0
+    dC[0] = 0.0
+    delta[0] = 0
+
+    with nogil:
+        while min(t_C, t_O) <= T:
+            if skip_idle and x == 0 and y > 0 and t_C <= t_O:
+                # 库存为 0 且订单在途：二分查找到货后的第一位顾客（等价于 searchsorted side='right'）
+                lo = k
+                hi = last + 1
+                while lo < hi:
+                    mid = (lo + hi) // 2
+                    if arrivals[mid] <= t_O:
+                        lo = mid + 1
+                    else:
+                        hi = mid
+                k = min(lo, last)
+                # 时钟停在最后一位被跳过且未超出 T 的顾客处，与逐个处理时一致
+                t = arrivals[k - 1]
+                t_C = arrivals[k]
+                continue
+            if t_C <= t_O:
+                t = t_C
+                D = demand[k]
+                w = min(D, x)
+                dr = w * r
+                dc = 0.0
+                x -= w
+                code = 1
+                if x < s and y == 0:
+                    y = S - x
+                    t_O = t + L
+                    code = 2
+                if D > w:
+                    code = 3
+                d = -w
+                k += 1
+                t_C = arrivals[k]
+            else:
+                t = t_O
+                dr = 0.0
+                dc = K + c_unit * y if y > 0 else 0.0
+                x += y
+                d = y
+                y = 0
+                t_O = INFINITY
+                code = 4
+
+            times[n] = t
+            inventory[n] = <int16_t>x
+            on_order[n] = <int16_t>y
+            codes[n] = code
+            dR[n] = dr
+            dC[n] = dc
+            R += dr
+            C += dc
+            delta[n] = <int16_t>d
+            n += 1
+
+    # 终止状态向量 (t, x, y, C, H, R)：t 为最后一个事件的时刻，H 由调用方积分后写入
+    state = np.array([t, x, y, C, 0.0, R], dtype=np.float64)
+    return (times_arr[:n], inventory_arr[:n], on_order_arr[:n], codes_arr[:n],
+            dR_arr[:n], dC_arr[:n], delta_arr[:n], state)
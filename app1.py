@@ -7,6 +7,8 @@ import graphviz
 import matplotlib.font_manager as fm
 import os
 import urllib.request
+from dataclasses import replace
+from simulation import SimParams, InventorySimulation, _draw_events, _run_batch
 
 st.set_page_config(
     page_title="(s, S) 库存策略仿真平台",
@@ -45,116 +47,24 @@ def setup_chinese_font():
         st.warning(f"字体加载遇到问题，使用默认字体。错误: {e}")
         plt.rcParams['axes.unicode_minus'] = False
 
-plt.style.use('seaborn-v0_8-whitegrid')
-setup_chinese_font()
-
-class InventorySimulation:
-    def __init__(self, params):
-        self.params = params
-        self.s = params['s']
-        self.S = params['S']
-        self.T = params['T']
-        self.lam = params['lam']
-        self.avg_demand = params.get('avg_demand', 1)
-        self.L = params['L']
-        self.r = params['r']
-        self.K = params['K']
-        self.c_unit = params['c']
-        self.h = params['h']
-        self.t = 0.0
-        self.x = self.S
-        self.y = 0
-        self.C = 0.0
-        self.H = 0.0
-        self.R = 0.0
-        self.t_C = 0.0
-        self.t_O = float('inf')
-        self.history = []
-
-    def _generate_next_arrival(self):
-        U = np.random.uniform(0, 1)
-        inter_arrival = - (1.0 / self.lam) * np.log(U)
-        return inter_arrival
-
-    def _generate_demand_size(self):
-        d = np.random.poisson(self.avg_demand)
-        return max(1, d)
-
-    def _calculate_ordering_cost(self, quantity):
-        if quantity <= 0: return 0
-        return self.K + self.c_unit * quantity
-
-    def run(self):
-        np.random.seed(self.params['seed'])
-        self.t = 0.0
-        self.x = self.S
-        self.y = 0
-        self.C = 0.0
-        self.H = 0.0
-        self.R = 0.0
-        self.t_C = self._generate_next_arrival()
-        self.t_O = float('inf')
-        
-        self.history.append({
-            '时间': 0.0, '现有库存': self.x, '在途订单': self.y, 
-            '事件类型': '初始化', '累计利润': 0.0, '变动量': 0
-        })
-        
-        while True:
-            next_event_time = min(self.t_C, self.t_O)
-            if next_event_time > self.T:
-                break
-                
-            if self.t_C <= self.t_O:
-                event_time = self.t_C
-                self.H += self.h * self.x * (event_time - self.t)
-                self.t = event_time
-                D = self._generate_demand_size()
-                w = min(D, self.x)
-                lost = D - w
-                self.R += w * self.r
-                self.x -= w
-                triggered_order = False
-                if self.x < self.s and self.y == 0:
-                    self.y = self.S - self.x
-                    self.t_O = self.t + self.L
-                    triggered_order = True
-                
-                current_profit = self.R - self.C - self.H
-                self.history.append({
-                    '时间': self.t, '现有库存': self.x, '在途订单': self.y,
-                    '事件类型': '缺货损失' if lost > 0 else ('顾客购买' if not triggered_order else '顾客购买并订货'),
-                    '累计利润': current_profit, '变动量': -w
-                })
-                if lost > 0:
-                     self.history[-1]['备注'] = f"需求:{D}, 满足:{w}, 丢失:{lost}"
-                self.t_C = self.t + self._generate_next_arrival()
-            else:
-                event_time = self.t_O
-                self.H += self.h * self.x * (event_time - self.t)
-                self.t = event_time
-                cost_order = self._calculate_ordering_cost(self.y)
-                self.C += cost_order
-                self.x += self.y
-                arrived_qty = self.y
-                self.y = 0
-                self.t_O = float('inf')
-                current_profit = self.R - self.C - self.H
-                self.history.append({
-                    '时间': self.t, '现有库存': self.x, '在途订单': self.y,
-                    '事件类型': '订单送达', '累计利润': current_profit, '变动量': arrived_qty
-                })
-
-        self.H += self.h * self.x * (self.T - self.t)
-        final_profit = self.R - self.C - self.H
-        self.df_log = pd.DataFrame(self.history)
-        summary = {
-            'final_profit': final_profit,
-            'total_revenue': self.R,
-            'total_ordering_cost': self.C,
-            'total_holding_cost': self.H
-        }
-        return self.df_log, summary
+@st.cache_resource
+def setup_plot_style():
+    """全局绘图样式只需在进程内配置一次"""
+    plt.style.use('seaborn-v0_8-whitegrid')
+    setup_chinese_font()
+
+setup_plot_style()
+
+@st.cache_data(ttl=24 * 3600, max_entries=2048, show_spinner=False)
+def simulate(params, return_log=True):
+    """按参数缓存单次仿真结果，参数不变时直接复用"""
+    return InventorySimulation(params).run(return_log=return_log)
+
+@st.cache_data(ttl=24 * 3600, max_entries=2048, show_spinner=False)
+def simulate_grid(T, lam, avg_demand, L, r, c, h, K, seed, s_arr, S_arr):
+    """按环境参数与策略网格缓存批量仿真的利润结果（侧边栏的 s/S 不参与缓存键）"""
+    arrivals, demand = _draw_events(lam, avg_demand, T, seed)
+    return _run_batch(s_arr, S_arr, T, L, r, K, c, h, arrivals, demand)
 
 st.sidebar.header("⚙️ 实验控制台")
 st.sidebar.subheader("1. 基础环境参数")
@@ -178,12 +88,12 @@ current_S = st.sidebar.slider("最大库存水平 S", min_S, 300, default_S)
 st.sidebar.subheader("4. 实验设置")
 seed = st.sidebar.number_input("随机种子", value=42, step=1)
 
-sim_params = {
-    'T': T, 'lam': lam, 'avg_demand': avg_demand, 'L': L,
-    'r': r, 'c': c, 'h': h, 'K': K,
-    's': current_s, 'S': current_S,
-    'seed': seed
-}
+sim_params = SimParams(
+    T=T, lam=lam, avg_demand=avg_demand, L=L,
+    r=r, c=c, h=h, K=K,
+    s=current_s, S=current_S,
+    seed=int(seed)
+)
 
 st.title("🏭 (s, S) 库存策略仿真与优化实验平台")
 st.markdown("**运筹学与数据科学实验室 | 基于离散事件仿真**")
@@ -264,16 +174,16 @@ with tab1:
         st.markdown(r"""
         **顾客到达时间间隔：**
         
-        泊松过程的到达间隔服从指数分布。我们使用逆变换法生成：
+        泊松过程的到达间隔服从指数分布 $\Delta t \sim \text{Exp}(\lambda)$。仿真开始前一次性生成整条到达流：
         
-        1. 生成均匀分布随机数 $U \sim \text{Uniform}(0,1)$
-        2. 利用逆变换法：$\Delta t = -\frac{1}{\lambda} \ln(U)$
-        3. 下一位顾客到达时间：$t_C = t + \Delta t$
+        1. 以随机种子创建 NumPy 随机数生成器 `np.random.default_rng(seed)`（PCG64 算法）
+        2. 批量抽取到达间隔：`rng.exponential(1/λ, size=n)`
+        3. 累加得到各顾客到达时刻：$t_{C,k} = \sum_{i \le k} \Delta t_i$，直到超过仿真周期 $T$
         
         **需求量生成：**
         
         单个顾客的需求量服从泊松分布：
-        * 使用 NumPy 库的 `np.random.poisson()` 函数
+        * 为每位到达的顾客批量抽取 `rng.poisson(avg_demand, size=m)`
         * 设定最小值为 1 以避免零需求
         * 泊松分布适合描述低频率的离散需求
         """)
@@ -370,94 +280,92 @@ with tab2:
     st.markdown("核心仿真循环的实现逻辑，包含详细注释：")
     
     code_source = """
-def run(self):
-    '''主仿真循环函数'''
+def draw_events(lam, avg_demand, T, seed):
+    '''预先生成整条顾客到达流'''
+    rng = np.random.default_rng(seed)
     
-    # 初始化阶段
-    np.random.seed(self.params['seed'])
+    # 到达间隔 ~ Exp(lam)，按期望顾客数留足余量批量抽取，累加得到到达时刻
+    cap = int(lam * T + 6 * np.sqrt(lam * T)) + 64
+    arrivals = np.cumsum(rng.exponential(1.0 / lam, cap))
+    while arrivals[-1] <= T:   # 极少数情况下余量不足，继续补抽
+        extra = arrivals[-1] + np.cumsum(rng.exponential(1.0 / lam, cap))
+        arrivals = np.concatenate([arrivals, extra])
     
-    self.t = 0.0
-    self.x = self.S
-    self.y = 0
-    self.C = 0.0
-    self.H = 0.0
-    self.R = 0.0
+    # [0, T] 内共 m 位顾客，末尾多保留一个超出 T 的到达时刻作为哨兵
+    m = np.searchsorted(arrivals, T, side='right')
     
-    # 生成第一个顾客到达时间
-    # 使用逆变换法：从均匀分布生成指数分布
-    U = np.random.uniform(0, 1)
-    self.t_C = - (1.0 / self.lam) * np.log(U)
+    # 每位顾客的需求量 ~ Poisson，最小为 1
+    demand = np.maximum(1, rng.poisson(avg_demand, m))
+    return arrivals[:m + 1], demand
+
+
+def run(s, S, T, L, r, K, c_unit, h, arrivals, demand):
+    '''主仿真循环函数'''
     
-    self.t_O = float('inf')
+    # 初始化阶段
+    t, x, y = 0.0, S, 0
+    C, R = 0.0, 0.0
+    k = 0                      # 下一位顾客的编号
+    t_C = arrivals[0]          # 下一位顾客到达时刻
+    t_O = float('inf')         # 下一批订单送达时刻
+    log = [(t, x)]             # 库存轨迹 (时刻, 库存)
     
     # 事件驱动主循环
-    while True:
-        next_event_time = min(self.t_C, self.t_O)
-        
-        if next_event_time > self.T:
-            break
+    while min(t_C, t_O) <= T:
         
         # 情况A：顾客到达事件
-        if self.t_C <= self.t_O:
-            # 更新持有成本
-            self.H += self.h * self.x * (self.t_C - self.t)
-            
+        if t_C <= t_O:
             # 推进系统时钟
-            self.t = self.t_C
-            
-            # 生成需求量
-            D = np.random.poisson(self.avg_demand)
-            D = max(1, D)
+            t = t_C
             
-            # 计算实际可销售数量
-            w = min(D, self.x)
-            lost = D - w
+            # 计算实际可销售数量（不足部分直接流失）
+            D = demand[k]
+            w = min(D, x)
             
             # 更新财务状态
-            self.R += w * self.r
-            self.x -= w
+            R += w * r
+            x -= w
             
             # 检查是否需要触发订货
-            if self.x < self.s and self.y == 0:
-                self.y = self.S - self.x
-                self.t_O = self.t + self.L
+            if x < s and y == 0:
+                y = S - x
+                t_O = t + L
             
-            # 生成下一位顾客到达时间
-            U = np.random.uniform(0, 1)
-            inter_arrival = - (1.0 / self.lam) * np.log(U)
-            self.t_C = self.t + inter_arrival
+            # 取出下一位顾客的到达时刻
+            k += 1
+            t_C = arrivals[k]
         
         # 情况B：订单送达事件
         else:
-            self.H += self.h * self.x * (self.t_O - self.t)
-            self.t = self.t_O
+            t = t_O
             
             # 支付订货成本
-            order_cost = self.K + self.c_unit * self.y
-            self.C += order_cost
+            C += K + c_unit * y
             
-            # 货物入库
-            self.x += self.y
-            
-            # 重置订单状态
-            self.y = 0
-            self.t_O = float('inf')
+            # 货物入库，重置订单状态
+            x += y
+            y = 0
+            t_O = float('inf')
+        
+        log.append((t, x))
     
-    # 结束处理
-    self.H += self.h * self.x * (self.T - self.t)
-    final_profit = self.R - self.C - self.H
+    # 结束处理：库存在两次事件之间不变，
+    # 持有成本即阶梯函数 h * x(t) 在 [0, T] 上的积分
+    times, inventory = map(np.array, zip(*log))
+    H = h * np.sum(inventory * np.diff(times, append=T))
     
-    return final_profit
+    return R - C - H
 """
     st.code(code_source, language='python')
     
-    st.info("💡 **实现细节**：本算法使用逆变换法从均匀分布生成指数分布的到达间隔，这是模拟泊松过程的标准方法。需求量则直接调用 NumPy 的泊松分布生成函数。")
-    # === Tab 3: 单次仿真 ===
-with tab3:
+    st.info("💡 **实现细节**：仿真开始前用 `np.random.default_rng(seed)` 一次性批量生成全部顾客的指数分布到达间隔与泊松需求量，主循环只按序读取这条预生成的事件流；同一随机种子下所有策略共用同一事件流（公共随机数），便于公平比较。")
+# === Tab 3: 单次仿真 ===
+@st.fragment
+def tab3_content(sim_params):
+    current_s, current_S = sim_params.s, sim_params.S
     st.subheader(f"当前策略: (s={current_s}, S={current_S})")
     
-    sim_engine = InventorySimulation(sim_params)
-    df_result, summary = sim_engine.run()
+    df_result, summary = simulate(sim_params)
     
     kpi1, kpi2, kpi3, kpi4 = st.columns(4)
     kpi1.metric("最终利润", f"{summary['final_profit']:,.2f}", delta_color="normal")
@@ -468,8 +376,16 @@ with tab3:
     st.markdown("### 📈 库存状态随时间变化图")
     fig, ax1 = plt.subplots(figsize=(12, 6))
     
-    times = df_result['时间']
-    inventory = df_result['现有库存']
+    # 长序列只对库存未清零的普通购买事件按步长抽样（约 2000 点）；订货、缺货、到货及库存清零的事件全部保留，
+    # 使阶梯轨迹不漏掉任何缺货区间并与事件散点对齐。KPI 与事件散点仍基于全部事件
+    stride = max(1, len(df_result) // 2000)
+    inventory = df_result['现有库存'].to_numpy()
+    keep = (df_result['事件类型'].cat.codes.to_numpy() != 1) | (inventory == 0)
+    keep[::stride] = True
+    keep[-1] = True
+    times = df_result['时间'].to_numpy()[keep]
+    inventory = inventory[keep]
+    profit_curve = df_result['累计利润'].to_numpy()[keep]
     
     color_inv = 'tab:blue'
     ax1.set_xlabel('仿真时间')
@@ -500,15 +416,16 @@ with tab3:
     ax2 = ax1.twinx()
     color_profit = 'tab:gray'
     ax2.set_ylabel('累计利润', color=color_profit, fontsize=12)
-    ax2.plot(times, df_result['累计利润'], color=color_profit, linestyle=':', linewidth=1.5, label='累计利润曲线')
+    ax2.plot(times, profit_curve, color=color_profit, linestyle=':', linewidth=1.5, label='累计利润曲线')
     ax2.tick_params(axis='y', labelcolor=color_profit)
     
     lines_1, labels_1 = ax1.get_legend_handles_labels()
     lines_2, labels_2 = ax2.get_legend_handles_labels()
     ax1.legend(lines_1 + lines_2, labels_1 + labels_2, loc='upper right', frameon=True, fancybox=True)
     
-    plt.title(f"仿真轨迹: T={T}, L={L}, s={current_s}, S={current_S}")
-    st.pyplot(fig)
+    plt.title(f"仿真轨迹: T={sim_params.T}, L={sim_params.L}, s={current_s}, S={current_S}")
+    st.pyplot(fig, clear_figure=True)
+    plt.close(fig)
 
     col_pie, col_data = st.columns([1, 2])
     
@@ -521,7 +438,8 @@ with tab3:
             fig_pie, ax_pie = plt.subplots()
             ax_pie.pie(cost_values, labels=cost_labels, autopct='%1.1f%%', startangle=90, colors=['#ff9999','#66b3ff'])
             ax_pie.set_title("运营成本构成")
-            st.pyplot(fig_pie)
+            st.pyplot(fig_pie, clear_figure=True)
+            plt.close(fig_pie)
         else:
             st.info("暂无成本产生")
         
@@ -536,8 +454,13 @@ with tab3:
             height=300
         )
 
+with tab3:
+    tab3_content(sim_params)
+
 # === Tab 4: 敏感性分析 ===
-with tab4:
+@st.fragment
+def tab4_content(sim_params):
+    current_s, current_S = sim_params.s, sim_params.S
     st.header("📈 单参数敏感性分析")
     st.markdown("分析当改变某一个参数时，对最终利润的影响趋势。")
     
@@ -546,41 +469,28 @@ with tab4:
     with col_param:
         analysis_target = st.selectbox("选择分析变量", ["再订货点 s", "最大库存 S", "订货提前期 L"])
     
-    results_sensitivity = []
-    x_vals = []
-    
     if analysis_target == "再订货点 s":
         st.caption(f"固定 S={current_S}, 变化 s")
-        range_values = range(0, current_S) 
+        x_vals = list(range(0, current_S))
         x_label = "再订货点 s"
-        for val in range_values:
-            p = sim_params.copy()
-            p['s'] = val
-            _, s = InventorySimulation(p).run()
-            results_sensitivity.append(s['final_profit'])
-            x_vals.append(val)
+        param_key = 's'
             
     elif analysis_target == "最大库存 S":
         st.caption(f"固定 s={current_s}, 变化 S")
-        range_values = range(current_s + 1, current_s + 51)
+        x_vals = list(range(current_s + 1, current_s + 51))
         x_label = "最大库存 S"
-        for val in range_values:
-            p = sim_params.copy()
-            p['S'] = val
-            _, s = InventorySimulation(p).run()
-            results_sensitivity.append(s['final_profit'])
-            x_vals.append(val)
+        param_key = 'S'
             
     elif analysis_target == "订货提前期 L":
         st.caption(f"固定 s, S, 变化 L")
-        range_values = np.linspace(0.5, 10.0, 20)
+        x_vals = list(np.linspace(0.5, 10.0, 20))
         x_label = "订货提前期 L"
-        for val in range_values:
-            p = sim_params.copy()
-            p['L'] = val
-            _, s = InventorySimulation(p).run()
-            results_sensitivity.append(s['final_profit'])
-            x_vals.append(val)
+        param_key = 'L'
+
+    results_sensitivity = np.fromiter(
+        (simulate(replace(sim_params, **{param_key: val}), return_log=False)[1]['final_profit'] for val in x_vals),
+        dtype=float, count=len(x_vals)
+    )
 
     fig_sens, ax_sens = plt.subplots(figsize=(10, 4))
     ax_sens.plot(x_vals, results_sensitivity, marker='o', linestyle='-', color='purple')
@@ -589,15 +499,20 @@ with tab4:
     ax_sens.set_title(f"敏感性分析: {x_label} 对利润的影响")
     ax_sens.grid(True, linestyle='--', alpha=0.6)
     
-    max_y = max(results_sensitivity)
-    max_x = x_vals[results_sensitivity.index(max_y)]
+    peak_idx = int(results_sensitivity.argmax())
+    max_y = results_sensitivity[peak_idx]
+    max_x = x_vals[peak_idx]
     ax_sens.annotate(f'峰值: {max_y:.0f}', xy=(max_x, max_y), xytext=(max_x, max_y*1.05),
                      arrowprops=dict(facecolor='black', shrink=0.05))
     
     st.pyplot(fig_sens)
 
+with tab4:
+    tab4_content(sim_params)
+
 # === Tab 5: 策略优化 ===
-with tab5:
+@st.fragment
+def tab5_content(sim_params):
     st.header("🎯 全局策略优化")
     st.markdown("遍历不同的组合，寻找利润最大化的参数配置。")
     
@@ -608,40 +523,33 @@ with tab5:
         S_max_search = st.slider("S 搜索上限", 10, 100, 60)
 
     if st.button("🚀 开始优化计算"):
-        progress_bar = st.progress(0)
-        
-        heatmap_data = []
-        best_profit = -float('inf')
-        best_config = (0, 0)
-        
-        s_range = range(0, s_max_search + 1, 2)
-        total_steps = len(s_range)
-        
-        for i, s_val in enumerate(s_range):
-            S_range = range(s_val + 5, S_max_search + 1, 5) 
-            for S_val in S_range:
-                p = sim_params.copy()
-                p['s'] = s_val
-                p['S'] = S_val
-                _, res = InventorySimulation(p).run()
-                
-                profit = res['final_profit']
-                heatmap_data.append({'s': s_val, 'S': S_val, 'Profit': profit})
-                
-                if profit > best_profit:
-                    best_profit = profit
-                    best_config = (s_val, S_val)
-            
-            progress_bar.progress((i + 1) / total_steps)
-        
-        df_heatmap = pd.DataFrame(heatmap_data)
+        s_range = np.arange(0, s_max_search + 1, 2)
+        S_range = np.arange(5, S_max_search + 1, 5)
+        s_grid, S_grid = np.meshgrid(s_range, S_range, indexing='ij')
+        valid = S_grid >= s_grid + 5
+
+        with st.spinner("正在批量仿真所有策略组合..."):
+            profits = simulate_grid(
+                sim_params.T, sim_params.lam, sim_params.avg_demand, sim_params.L, sim_params.r,
+                sim_params.c, sim_params.h, sim_params.K, sim_params.seed,
+                s_grid[valid], S_grid[valid]
+            )
+
+        profit_mat = np.full(s_grid.shape, np.nan)
+        profit_mat[valid] = profits
+        best_i, best_j = np.unravel_index(np.nanargmax(profit_mat), profit_mat.shape)
+        best_profit = profit_mat[best_i, best_j]
+        best_config = (s_range[best_i], S_range[best_j])
         
         st.success(f"✅ 优化完成! 建议策略: s* = {best_config[0]}, S* = {best_config[1]}, 预期利润: {best_profit:,.2f}")
         
-        pivot_table = df_heatmap.pivot(index='s', columns='S', values='Profit')
+        pivot_table = pd.DataFrame(profit_mat, index=s_range, columns=S_range)
         
         fig_hm, ax_hm = plt.subplots(figsize=(10, 8))
         sns.heatmap(pivot_table, annot=False, fmt=".0f", cmap="viridis", ax=ax_hm, cbar_kws={'label': '总利润'})
         ax_hm.set_title("利润热力图")
         ax_hm.invert_yaxis()
-        st.pyplot(fig_hm)
\ No newline at end of file
+        st.pyplot(fig_hm)
+
+with tab5:
+    tab5_content(sim_params)
\ No newline at end of file
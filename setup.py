@@ -0,0 +1,8 @@
+from setuptools import Extension, setup
+from Cython.Build import cythonize
+
+# 可选的 Cython 仿真内核：python setup.py build_ext --inplace
+setup(
+    name="inventory-simulation-core",
+    ext_modules=cythonize([Extension("_sim_core", ["_sim_core.pyx"])]),
+)
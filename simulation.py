@@ -0,0 +1,236 @@
+"""(s, S) 库存策略离散事件仿真引擎（与 Streamlit 界面解耦，便于复用与测试）"""
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+try:
+    from numba import njit
+except ImportError:
+    # 未安装 Numba 时主循环以纯 Python 执行；也可编译 Cython 内核 _sim_core 替代
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+EVENT_LABELS = ['初始化', '顾客购买', '顾客购买并订货', '缺货损失', '订单送达']
+# 仿真终止状态向量 (t, x, y, C, H, R) 的下标：t 为最后一个事件的时刻，H 由 run() 积分后写入
+T_, X_, Y_, C_, H_, R_ = range(6)
+
+def _draw_events(lam, avg_demand, T, seed):
+    """预先生成 [0, T] 内全部顾客的到达时刻与需求量，到达时刻末尾多保留一个超出 T 的哨兵"""
+    rng = np.random.default_rng(seed)
+    cap = int(lam * T + 6 * np.sqrt(lam * T)) + 64
+    arrivals = np.cumsum(rng.exponential(1.0 / lam, cap))
+    while arrivals[-1] <= T:
+        extra = arrivals[-1] + np.cumsum(rng.exponential(1.0 / lam, cap))
+        arrivals = np.concatenate([arrivals, extra])
+    m = int(np.searchsorted(arrivals, T, side='right'))
+    demand = np.maximum(1, rng.poisson(avg_demand, m))
+    return arrivals[:m + 1], demand
+
+@njit(cache=True)
+def _run_core(s, S, T, L, r, K, c_unit, arrivals, demand, skip_idle):
+    """离散事件主循环（Numba 编译），返回事件日志数组及终止状态；持有成本由调用方对库存轨迹积分得到"""
+    # 每位顾客至多触发一次订货，事件总数不超过 2 * 顾客数 + 1
+    cap = 2 * arrivals.shape[0] + 1
+    times = np.empty(cap, np.float64)
+    inventory = np.empty(cap, np.int16)
+    on_order = np.empty(cap, np.int16)
+    codes = np.empty(cap, np.int8)
+    dR = np.empty(cap, np.float64)
+    dC = np.empty(cap, np.float64)
+    delta = np.empty(cap, np.int16)
+
+    t = 0.0
+    x = S
+    y = 0
+    C = 0.0
+    R = 0.0
+    k = 0
+    t_C = arrivals[0]
+    t_O = np.inf
+
+    times[0] = 0.0
+    inventory[0] = x
+    on_order[0] = 0
+    codes[0] = 0
+    dR[0] = 0.0
+    dC[0] = 0.0
+    delta[0] = 0
+    n = 1
+
+    last = arrivals.shape[0] - 1
+    while min(t_C, t_O) <= T:
+        if skip_idle and x == 0 and y > 0 and t_C <= t_O:
+            # 库存为 0 且订单在途：到货前的顾客全部流失且不改变状态，直接跳到到货后的第一位顾客
+            # 汇总结果不变，但这些缺货事件不会写入日志，因此仅在不需要日志时启用
+            k = min(np.searchsorted(arrivals, t_O, side='right'), last)
+            # 时钟停在最后一位被跳过且未超出 T 的顾客处，与逐个处理时一致
+            t = arrivals[k - 1]
+            t_C = arrivals[k]
+            continue
+        if t_C <= t_O:
+            t = t_C
+            D = demand[k]
+            w = min(D, x)
+            dr = w * r
+            dc = 0.0
+            x -= w
+            code = 1
+            if x < s and y == 0:
+                y = S - x
+                t_O = t + L
+                code = 2
+            if D > w:
+                code = 3
+            d = -w
+            k += 1
+            t_C = arrivals[k]
+        else:
+            t = t_O
+            dr = 0.0
+            dc = K + c_unit * y if y > 0 else 0.0
+            x += y
+            d = y
+            y = 0
+            t_O = np.inf
+            code = 4
+
+        times[n] = t
+        inventory[n] = x
+        on_order[n] = y
+        codes[n] = code
+        dR[n] = dr
+        dC[n] = dc
+        R += dr
+        C += dc
+        delta[n] = d
+        n += 1
+
+    state = np.empty(6, np.float64)
+    state[T_] = t
+    state[X_] = x
+    state[Y_] = y
+    state[C_] = C
+    state[H_] = 0.0
+    state[R_] = R
+    return times[:n], inventory[:n], on_order[:n], codes[:n], dR[:n], dC[:n], delta[:n], state
+
+_run_core_jit = _run_core
+
+try:
+    # 已通过 python setup.py build_ext --inplace 编译 Cython 内核时优先使用
+    from _sim_core import run_core as _run_core
+except ImportError:
+    pass
+
+@dataclass(frozen=True, slots=True)
+class SimParams:
+    """仿真参数（不可变、可哈希，可直接作为缓存键）"""
+    T: int
+    lam: float
+    avg_demand: int
+    L: float
+    r: float
+    c: float
+    h: float
+    K: float
+    s: int
+    S: int
+    seed: int
+
+class InventorySimulation:
+    def __init__(self, params):
+        self.params = params
+        self.s = params.s
+        self.S = params.S
+        self.T = params.T
+        self.lam = params.lam
+        self.avg_demand = params.avg_demand
+        self.L = params.L
+        self.r = params.r
+        self.K = params.K
+        self.c_unit = params.c
+        self.h = params.h
+        # 事件日志以 int16 存储库存、在途量与变动量，三者均不超过 S
+        if self.S > np.iinfo(np.int16).max:
+            raise ValueError(f"最大库存 S={self.S} 超出事件日志 int16 存储范围 ({np.iinfo(np.int16).max})")
+
+    def run(self, return_log=True):
+        arrivals, demand = _draw_events(self.lam, self.avg_demand, self.T, self.params.seed)
+        times, inventory, on_order, codes, dR, dC, delta, self._state = _run_core(
+            int(self.s), int(self.S), float(self.T), float(self.L), float(self.r),
+            float(self.K), float(self.c_unit), arrivals, demand, not return_log
+        )
+        # 库存在两次事件之间保持不变，持有成本即阶梯函数 h * x(t) 在 [0, T] 上的积分
+        holding = self.h * inventory * np.diff(times, append=float(self.T))
+        self._state[H_] = holding.sum()
+        R, C, H = float(self._state[R_]), float(self._state[C_]), float(self._state[H_])
+        final_profit = R - C - H
+        self.df_log = None
+        if return_log:
+            # 第 i 个事件的持有成本增量对应其前一段库存区间
+            dH = np.concatenate(([0.0], holding[:-1]))
+            profit = (np.cumsum(dR) - np.cumsum(dC) - np.cumsum(dH)).astype(np.float32)
+            self.df_log = pd.DataFrame({
+                '时间': times.astype(np.float32),
+                '现有库存': inventory,
+                '在途订单': on_order,
+                '事件类型': pd.Categorical.from_codes(codes, categories=EVENT_LABELS),
+                '累计利润': profit,
+                '变动量': delta
+            })
+        summary = {
+            'final_profit': final_profit,
+            'total_revenue': R,
+            'total_ordering_cost': C,
+            'total_holding_cost': H
+        }
+        return self.df_log, summary
+
+def _run_batch(s_arr, S_arr, T, L, r, K, c_unit, h, arrivals, demand):
+    """向量化批量仿真：所有 (s, S) 策略共用同一组到达时刻与需求量（公共随机数）同步推进，返回各策略的最终利润"""
+    s_arr = np.asarray(s_arr, dtype=np.int64)
+    S_arr = np.asarray(S_arr, dtype=np.int64)
+    N = s_arr.shape[0]
+
+    t = np.zeros(N)
+    x = S_arr.copy()
+    y = np.zeros(N, dtype=np.int64)
+    k = np.zeros(N, dtype=np.int64)
+    t_C = np.full(N, arrivals[0])
+    t_O = np.full(N, np.inf)
+    H = np.zeros(N)
+    C = np.zeros(N)
+    R = np.zeros(N)
+
+    # 末尾补一个 0 需求，使已越过最后一位顾客的路径也能无分支地取数
+    demand = np.append(demand, 0)
+    minimum = np.minimum
+    where = np.where
+    inf = np.inf
+    while True:
+        event_t = minimum(t_C, t_O)
+        alive = event_t <= T
+        if not alive.any():
+            break
+        cust = alive & (t_C <= t_O)
+        arr = alive & ~cust
+
+        t_next = where(alive, event_t, t)
+        H += h * x * (t_next - t)
+        t = t_next
+
+        w = cust * minimum(demand[k], x)
+        R += r * w
+        x -= w
+        k += cust
+        t_C = where(cust, arrivals[k], t_C)
+        need_order = cust & (x < s_arr) & (y == 0)
+        y = where(need_order, S_arr - x, y)
+        t_O = where(need_order, t + L, t_O)
+
+        C += arr * (K + c_unit * y)
+        x += arr * y
+        y = where(arr, 0, y)
+        t_O = where(arr, inf, t_O)
+
+    H += h * x * (T - t)
+    return R - C - H
@@ -0,0 +1,80 @@
+"""各仿真后端（Numba/Cython 主循环、批量向量化引擎）结果一致性的回归测试"""
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from simulation import T_, SimParams, InventorySimulation, _draw_events, _run_batch, _run_core_jit
+
+
+def _random_params(n, seed=2025):
+    """按侧边栏取值范围随机生成 n 组仿真参数"""
+    rng = np.random.default_rng(seed)
+    params = []
+    for _ in range(n):
+        s = int(rng.integers(0, 201))
+        params.append(SimParams(
+            T=int(rng.integers(10, 366)),
+            lam=float(rng.uniform(0.1, 10.0)),
+            avg_demand=int(rng.integers(1, 11)),
+            L=float(rng.uniform(0.1, 10.0)),
+            r=float(rng.uniform(1.0, 200.0)),
+            c=float(rng.uniform(1.0, 200.0)),
+            h=float(rng.uniform(0.1, 50.0)),
+            K=float(rng.uniform(0.0, 500.0)),
+            s=s,
+            S=int(rng.integers(s + 1, 301)),
+            seed=int(rng.integers(0, 2**31)),
+        ))
+    return params
+
+
+PARAMS = _random_params(40)
+
+
+def _core_args(p, skip_idle):
+    arrivals, demand = _draw_events(p.lam, p.avg_demand, p.T, p.seed)
+    return (p.s, p.S, float(p.T), float(p.L), float(p.r), float(p.K), float(p.c),
+            arrivals, demand, skip_idle)
+
+
+@pytest.mark.parametrize("p", PARAMS)
+def test_log_and_skip_idle_paths_agree(p):
+    sim_log, sim_skip = InventorySimulation(p), InventorySimulation(p)
+    df_log, with_log = sim_log.run(return_log=True)
+    _, without_log = sim_skip.run(return_log=False)
+    assert with_log.keys() == without_log.keys()
+    for key in with_log:
+        assert without_log[key] == pytest.approx(with_log[key], rel=1e-9, abs=1e-6)
+    # 终止状态 (t, x, y, C, H, R) 同样一致，t 为最后一个事件的时刻
+    np.testing.assert_allclose(sim_skip._state, sim_log._state, rtol=1e-9, atol=1e-6)
+    assert sim_log._state[T_] == pytest.approx(float(df_log['时间'].iloc[-1]), rel=1e-6)
+    # 日志末行的累计利润只差最后一个事件到 T 的持有成本
+    tail_holding = p.h * df_log['现有库存'].iloc[-1] * (p.T - float(df_log['时间'].iloc[-1]))
+    assert df_log['累计利润'].iloc[-1] - tail_holding == pytest.approx(with_log['final_profit'], rel=1e-4, abs=1e-2)
+
+
+@pytest.mark.parametrize("p", PARAMS[:20])
+def test_batch_engine_matches_single_runs_on_tab5_grid(p):
+    # 与 Tab 5 相同的策略网格：各策略的订货与到货时刻互不相同，检验同步推进时状态不会串到其他策略
+    s_range = np.arange(0, 41, 2)
+    S_range = np.arange(5, 101, 5)
+    s_grid, S_grid = np.meshgrid(s_range, S_range, indexing='ij')
+    valid = S_grid >= s_grid + 5
+    arrivals, demand = _draw_events(p.lam, p.avg_demand, p.T, p.seed)
+    profits = _run_batch(s_grid[valid], S_grid[valid], p.T, p.L, p.r, p.K, p.c, p.h, arrivals, demand)
+    expected = [
+        InventorySimulation(replace(p, s=int(s), S=int(S))).run(return_log=False)[1]['final_profit']
+        for s, S in zip(s_grid[valid], S_grid[valid])
+    ]
+    np.testing.assert_allclose(profits, expected, rtol=1e-9, atol=1e-6)
+
+
+@pytest.mark.parametrize("skip_idle", [False, True])
+@pytest.mark.parametrize("p", PARAMS)
+def test_cython_core_matches_numba_core(p, skip_idle):
+    sim_core = pytest.importorskip("_sim_core")
+    args = _core_args(p, skip_idle)
+    for got, want in zip(sim_core.run_core(*args), _run_core_jit(*args)):
+        assert got.dtype == want.dtype
+        np.testing.assert_allclose(got, want, rtol=1e-12)